@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+"""
+Columnar.py
+
+A small binary column format for passing Unit
+results between runs without pickling boxed values
+
+Layout of a file:
+    * 8 byte magic string "UNITCOL1"
+    * byte order ('<' or '>') and the number of columns
+    * one entry per column: type code, length, data offset
+    * the column data, each block aligned to 8 bytes
+
+Column types:
+    * 'q' - 64-bit signed integers
+    * 'd' - 64-bit floats
+    * 's' - strings, stored as N+1 integer offsets
+            followed by the UTF-8 bytes of every string
+
+An empty column has no type to go by and is saved as an
+empty string column.
+
+Files are read back through mmap, so numeric columns come
+back as NumberColumns and string columns as StringColumns,
+both of which index and slice without reading or copying
+the rest of the file.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+
+MAGIC  = b"UNITCOL1"
+HEADER = struct.Struct("=8scI")
+ENTRY  = struct.Struct("=cQQ")
+ORDER  = b"<" if sys.byteorder == "little" else b">"
+
+# Lists and list-like views compare equal when their items do
+# Strings, bytes and tuples never equal a list, so neither do columns
+def _listlike(other):
+    return isinstance(other, Sequence) and not isinstance(other, (str, bytes, bytearray, tuple, range))
+
+class NumberColumn(object):
+    """
+    A read-only sequence of numbers over a typed memoryview.
+    Slicing shares the same buffer, and it compares and 
+    prints like the list of numbers it holds.
+    """
+
+    __slots__ = ['values']
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return NumberColumn(self.values[index])
+        return self.values[index]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __reversed__(self):
+        return reversed(self.values)
+
+    def __eq__(self, other):
+        if _listlike(other):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def tolist(self):
+        return self.values.tolist()
+
+    def __repr__(self):
+        return "NumberColumn({})".format(repr(self.tolist()))
+
+class StringColumn(object):
+    """
+    A read-only sequence of strings stored as offsets into
+    a block of UTF-8 bytes. Slicing shares the same buffer,
+    strings are only decoded when they are looked at.
+    """
+
+    __slots__ = ['offsets', 'data']
+
+    # offsets is a memoryview of N+1 integers, data the bytes
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return StringColumn(self.offsets[start:max(start, stop) + 1], self.data)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringColumn index out of range")
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if _listlike(other):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "StringColumn({})".format(repr(list(self)))
+
+Sequence.register(NumberColumn)
+Sequence.register(StringColumn)
+
+# Pick the type code of a column from its values
+# Typed buffers (ie. from collect()) are widened to 'q' or 'd'
+def _column_type(column):
+    if isinstance(column, StringColumn):
+        return b"s"
+    if isinstance(column, NumberColumn):
+        column = column.values
+    if isinstance(column, memoryview):
+        if column.format in ("f", "d"):
+            return b"d"
+        if column.format in ("b", "B", "h", "H", "i", "I", "l", "L", "q", "Q"):
+            return b"q"
+        raise Exception("save() - unsupported buffer format")
+    kinds = set(map(type, column))
+    if kinds <= {str}:
+        return b"s"
+    if bool in kinds:
+        raise Exception("save() - bools aren't supported, convert them to ints")
+    if kinds <= {int}:
+        return b"q"
+    if kinds <= {int, float}:
+        return b"d"
+    raise Exception("save() - columns must hold only numbers or only strings")
+
+# Turn a column into the blocks of bytes that get written
+def _column_blocks(code, column):
+    if isinstance(column, NumberColumn):
+        column = column.values
+    if isinstance(column, memoryview) and column.format == code.decode():
+        return [column.tobytes()]
+    if code != b"s":
+        try:
+            return [array.array(code.decode(), column).tobytes()]
+        except OverflowError:
+            raise Exception("save() - integers must fit in 64 bits")
+    encoded = [x.encode("utf-8") for x in column]
+    offsets = array.array("q", [0])
+    for x in encoded:
+        offsets.append(offsets[-1] + len(x))
+    return [offsets.tobytes(), b"".join(encoded)]
+
+def _pad(size):
+    return -size % 8
+
+def save_columns(path, columns):
+    """
+    save_columns :: String -> [[a]] -> IO ()
+    Write a list of columns to a file
+    The file is swapped in whole once written, so views still 
+    mapping an older version of it keep seeing the old data
+    """
+    codes = [_column_type(c) for c in columns]
+    blocks = [_column_blocks(t, c) for t, c in zip(codes, columns)]
+    offset = HEADER.size + ENTRY.size * len(columns)
+    offset += _pad(offset)
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, ORDER, len(columns)))
+        for t, c, b in zip(codes, columns, blocks):
+            f.write(ENTRY.pack(t, len(c), offset))
+            size = sum(len(x) for x in b)
+            offset += size + _pad(size)
+        f.write(b"\0" * _pad(f.tell()))
+        for b in blocks:
+            data = b"".join(b)
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(temp, path)
+
+def load_columns(path):
+    """
+    load_columns :: String -> [[a]]
+    Map a file into memory and return views of its columns
+    """
+    with open(path, "rb") as f:
+        buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    magic, order, count = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise Exception("load() - not a Unit column file")
+    if order != ORDER:
+        raise Exception("load() - file was written with another byte order")
+    columns = list()
+    for i in range(count):
+        code, length, offset = ENTRY.unpack_from(buf, HEADER.size + ENTRY.size * i)
+        if code == b"s":
+            end = offset + 8 * (length + 1)
+            offsets = buf[offset:end].cast("q")
+            columns.append(StringColumn(offsets, buf[end:end + offsets[-1]]))
+        else:
+            columns.append(NumberColumn(buf[offset:offset + 8 * length].cast(code.decode())))
+    return columns
+
+# end
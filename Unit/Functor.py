@@ -33,6 +33,20 @@ Concept:
     h(g(f(x)))
 """
 
+try:
+    from .Columnar import load_columns
+except Exception:
+    from Columnar import load_columns
+
+# One-shot streams (generators, files, map objects) can only 
+# be walked once, so turn them into lists before sharing them
+def _settle(value):
+    if isinstance(value, tuple):
+        return tuple(_settle(v) for v in value)
+    if hasattr(value, "__next__"):
+        return list(value)
+    return value
+
 # Start with a unit class...
 class Unit(object):
     """
@@ -72,6 +86,20 @@ class Unit(object):
     def id(self):
         return self.acc
 
+    # Branch off a new Unit sharing the current value
+    # The value isn't copied, so a computed prefix can be 
+    # reused by as many chains as needed without recomputing it
+    # Streams are read into a list first so every branch sees them
+    def fork(self):
+        self.acc = _settle(self.acc)
+        return self.__class__(self.acc)
+
+    # Open the columns of a file written by save()
+    # One column gives a Unit of it, more give a tuple
+    @classmethod
+    def load(cls, path):
+        return cls(*load_columns(path))
+
     # The '|' operator
     def __or__(self, function):
         return self.apply(function)
@@ -81,10 +109,34 @@ class Unit(object):
         return "{}".format(self.acc.__str__())
 
     def __repr__(self):
-        return "Unit({})".format(repr(self.acc))
+        return "{}({})".format(self.__class__.__name__, repr(self.acc))
 
     def __eq__(self,other):
         return self.acc == other.acc
 
 
+# An immutable Unit
+class Frozen(Unit):
+    """
+    A Unit that is never changed by an operation. Applying 
+    a function returns a new Frozen holding the result, so 
+    a shared prefix survives any number of downstream chains 
+    and can be used from multiple threads at once.
+    """
+
+    __slots__ = []
+
+    # Streams are read in up front so they can be shared
+    def __init__(self, *value):
+        Unit.__init__(self, *value)
+        self.acc = _settle(self.acc)
+
+    # Apply onto a fork instead of ourselves
+    def apply(self, function):
+        res = Unit.apply(self.fork(), function)
+        if isinstance(res, Frozen):
+            res.acc = _settle(res.acc)
+        return res
+
+
 # end
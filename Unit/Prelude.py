@@ -17,6 +17,25 @@ Some rules:
 
 """
 
+import array
+import hashlib
+import heapq
+import itertools
+import math
+import multiprocessing
+import pickle
+import queue
+import random
+import tempfile
+import threading
+
+try:
+    from .Columnar import NumberColumn, StringColumn, save_columns
+    from .View import ListView, slice_of
+except Exception:
+    from Columnar import NumberColumn, StringColumn, save_columns
+    from View import ListView, slice_of
+
 # Typeclass stuff
 # Use these to enforce rules amongst Unit functions
 # Int    - units that represent whole numbers (int, bool)
@@ -35,9 +54,9 @@ typeclasses = {
     Int    : (int, bool),
     Num    : (int, float, complex),
     Real   : (int, float),
-    Ord    : (int, float, complex, bool, str, list, bytes),
-    Enum   : (list, tuple, set, frozenset, dict, str),
-    Fold   : (int, float, complex, bool, list, tuple, str, bytes),
+    Ord    : (int, float, complex, bool, str, list, bytes, ListView),
+    Enum   : (list, tuple, set, frozenset, dict, str, memoryview, NumberColumn, StringColumn, ListView),
+    Fold   : (int, float, complex, bool, list, tuple, str, bytes, ListView),
     String : (str,),
     Func   : (type(lambda:None),),
     Any    : (object,),
@@ -106,6 +125,22 @@ def type_not(cls):
     """
     return not type_of(cls)
 
+# Streams are one-shot iterators (generators, files, map objects)
+# They can only be walked over once and have no length
+def _is_stream(data):
+    return hasattr(data, "__next__")
+
+# Views are list-like slices or columns backed by a shared buffer
+# Slicing them is free, so treat them like lists
+def _is_view(data):
+    return isinstance(data, (ListView, memoryview, NumberColumn, StringColumn))
+
+# Walk over data without copying it into a list first
+def _each(data):
+    if hasattr(data, "__iter__"):
+        return data
+    return [data]
+
 # This essentially returns the entire Unit container
 def id(*data):
     """
@@ -129,9 +164,13 @@ def puts(data):
 def head(data):
     """
     head :: [a] -> [a]
-    Return the first item in an Enumerable type
+    Return the first item in an Enumerable type or a stream
     If data is not a list type, return it
     """
+    if _is_stream(data):
+        for x in data:
+            return x
+        raise IndexError("head() - empty stream")
     if isnt_type(Enum, data):
         return data
     return data[0]
@@ -141,25 +180,32 @@ def tail(data):
     """
     tail :: [a] -> [a]
     Return the tail (everything after the first)
+    Lists give back a ListView of themselves rather than a copy
+    Streams give back a stream that skips the first element
     If data is not a list, return None
     """
+    if _is_stream(data):
+        return itertools.islice(data, 1, None)
     if isnt_type(Enum, data):
         return None
-    return data[1:]
+    return slice_of(data, 1, None)
 
 # Take a number of elements from a list
 def take(amount):
     """
     take :: Int -> [a] -> [a]
-    Take a number of elements from an Enumerable
+    Take a number of elements from an Enumerable or a stream
+    Lists give back a ListView of themselves rather than a copy
     If the unit data is not a list, return None
     """
     if isnt_type(Num, amount):
         raise Exception("take() - value given not an Integer")
     def itake(data):
-        if not isinstance(data, list):
+        if _is_stream(data):
+            return list(itertools.islice(data, amount))
+        if not isinstance(data, list) and not _is_view(data):
             return None
-        return data[:amount]
+        return slice_of(data, None, amount)
     return itake
 
 # Drop a number of elements from a list
@@ -167,14 +213,18 @@ def drop(amount):
     """
     drop :: Int -> [a] -> [a]
     Drop values and return the remainder
+    Lists give back a ListView of themselves rather than a copy
+    Streams give back a stream that skips the dropped elements
     If the unit data is not a list, return None
     """
     if not isinstance(amount, int):
         raise Exception("drop() - value given not an Integer")
     def idrop(data):
-        if not isinstance(data, list):
+        if _is_stream(data):
+            return itertools.islice(data, amount, None)
+        if not isinstance(data, list) and not _is_view(data):
             return None
-        return data[amount:]
+        return slice_of(data, amount, None)
     return idrop
 
 # Successor of a value (increment on Int)
@@ -316,17 +366,85 @@ def scale(value):
 
 # Take a function with no arguments and 
 # collects the results a number of times
-def collect(amount):
+# Seeded or parallel runs are split into fixed blocks, each 
+# with its own seed, so the results never depend on how many 
+# workers drew them
+_block = 8192
+_numeric_codes = "bBhHiIlLqQfd"
+
+def _collect_block(fun, count, seed, typecode):
+    if seed is not None:
+        random.seed(seed)
+        # Methods of a Random instance (ie. random.random) arrive in 
+        # a worker as a copy of that instance, so seed it too
+        owner = getattr(fun, "__self__", None)
+        if isinstance(owner, random.Random):
+            owner.seed(seed)
+    if typecode is None:
+        return [fun() for x in range(count)]
+    buf = array.array(typecode, [0]) * count
+    for i in range(count):
+        buf[i] = fun()
+    return buf
+
+def _collect_job(job):
+    return _collect_block(*job)
+
+def collect(amount, typecode=None, workers=1, seed=None):
     """
-    collect :: (a) -> Int -> [a]
+    collect :: Int -> Maybe Char -> Int -> Maybe Int -> (() -> a) -> [a]
+    collect :: Num a => Int -> Char -> Int -> Maybe Int -> (() -> a) -> NumberColumn a
     Call a non-argument function N times and 
     return the results (ie. random.random())
-    """
+    With a numeric typecode ('d', 'q', ... see the array module) the results 
+    are written into a preallocated typed buffer and returned as a 
+    NumberColumn. With more than one worker the calls are spread over 
+    that many processes, so the function must be picklable (no lambdas).
+    Given a seed, draws made through the random module are reproducible 
+    for any number of workers.
+    """
+    if isnt_type(Int, amount) or isnt_type(Int, workers):
+        raise Exception("collect() - amount and workers must be Integers")
+    if amount < 0 or workers < 1:
+        raise Exception("collect() - invalid amount or workers")
+    if typecode is not None and typecode not in _numeric_codes:
+        raise Exception("collect() - typecode must be a numeric array typecode")
     def icoll(fun):
-        res = list()
-        for x in range(amount):
-           res.append(fun())
-        return res
+        if workers == 1 and seed is None:
+            if typecode is None:
+                res = list()
+                for x in range(amount):
+                   res.append(fun())
+                return res
+            return NumberColumn(memoryview(_collect_block(fun, amount, None, typecode)))
+        seeder = random.Random(seed) if seed is not None else random.SystemRandom()
+        jobs = [(fun, min(_block, amount - start), seeder.getrandbits(64), typecode)
+                for start in range(0, amount, _block)]
+        if typecode is None:
+            res = [None] * amount
+        else:
+            res = array.array(typecode, [0]) * amount
+        # Blocks are copied in as they arrive so only a few are alive at once
+        def fill(blocks):
+            for i, block in enumerate(blocks):
+                res[i * _block:i * _block + len(block)] = block
+        if workers == 1:
+            # Seeding here would change the caller's generators, so put 
+            # back the random module's state and that of fun's own Random
+            rngs = [random]
+            owner = getattr(fun, "__self__", None)
+            if isinstance(owner, random.Random):
+                rngs.append(owner)
+            states = [r.getstate() for r in rngs]
+            try:
+                fill(_collect_job(job) for job in jobs)
+            finally:
+                for r, state in zip(rngs, states):
+                    r.setstate(state)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                fill(pool.imap(_collect_job, jobs))
+        return res if typecode is None else NumberColumn(memoryview(res))
     return icoll
 
 # Span a list from 0 to x
@@ -360,10 +478,13 @@ def length(data):
     """
     length :: Enum t => t a -> Int
     Return the length of an Enumerable type
+    Streams are counted by walking through them
     If not enumerable, return 1
     """
     if is_type(Enum, data):
         return len(data)
+    if _is_stream(data):
+        return sum(1 for x in data)
     return len([data])
 
 # Apply a map to the data
@@ -373,9 +494,12 @@ def fmap(func):
     fmap :: Enum f => (a -> b) -> f a -> f b
     Map a function across a functor
     Similar to builtins.map()
+    Streams are mapped lazily and stay streams
     """
     def imap(data):
-        if not isinstance(data, list):
+        if _is_stream(data):
+            return map(func, data)
+        if not isinstance(data, list) and not _is_view(data):
             return list(map(func, [data]))
         return list(map(func, data))
     return imap
@@ -388,9 +512,12 @@ def select(func):
     select :: (a -> Bool) -> [a] -> [a]
     Grab elements based on a filter function
     Similar to builtins.filter()
+    Streams are filtered lazily and stay streams
     """
     def imap(data):
-        if not isinstance(data, list):
+        if _is_stream(data):
+            return filter(func, data)
+        if not isinstance(data, list) and not _is_view(data):
             return list(filter(func, [data]))
         return list(filter(func, data))
     return imap
@@ -401,10 +528,13 @@ def comp(comp_fun):
     comp :: (a -> a -> Bool) -> a -> [a] -> [a]
     Comp serves as the higher-order for comparison operators
     Use the shortcut functions like gt() for better results
+    Streams are filtered lazily and stay streams
     """
     def inner1(value):
         def inner2(data):
-            if not isinstance(data, list):
+            if _is_stream(data):
+                return filter(comp_fun, data)
+            if not isinstance(data, list) and not _is_view(data):
                 return list(filter(comp_fun, [data]))
             return list(filter(comp_fun, data))
         return inner2
@@ -460,7 +590,7 @@ def zip_with(zipper):
     Take two lists and zip them together to produce a pair-list
     """
     def izip(data):
-        if isnt_type(Enum, data):
+        if isnt_type(Enum, data) and not _is_stream(data):
             return list(zip([data], zipper))
         return list(zip(data, zipper))
     return izip
@@ -475,9 +605,7 @@ def reduce(func):
     """
     def ired(data):
         accum = None
-        if isnt_type(Enum, data):
-            data = list(data)
-        for x in data:
+        for x in _each(data):
             if accum is None:
                 accum = x
             else:
@@ -485,6 +613,356 @@ def reduce(func):
         return accum
     return ired
 
+# Hash-indexed combinators
+# Build a dict once and do O(1) lookups instead of 
+# nesting select() calls inside of fmap() lambdas
+def group_by(key):
+    """
+    group_by :: (a -> k) -> [a] -> {k: [a]}
+    Group elements into lists under the result of a key function
+    Groups keep the order their keys were first seen in
+    """
+    def igroup(data):
+        groups = dict()
+        for x in _each(data):
+            k = key(x)
+            if k in groups:
+                groups[k].append(x)
+            else:
+                groups[k] = [x]
+        return groups
+    return igroup
+
+def distinct(key):
+    """
+    distinct :: (a -> k) -> [a] -> [a]
+    Keep the first element seen for each key, dropping the rest
+    ie: Unit([1, 2, 3, 4]) | distinct(odd) = [1, 2]
+    """
+    def idist(data):
+        seen = set()
+        res = list()
+        for x in _each(data):
+            k = key(x)
+            if k not in seen:
+                seen.add(k)
+                res.append(x)
+        return res
+    return idist
+
+def count_by(key):
+    """
+    count_by :: (a -> k) -> [a] -> {k: Int}
+    Count how many elements fall under each key
+    """
+    def icount(data):
+        counts = dict()
+        for x in _each(data):
+            k = key(x)
+            counts[k] = counts.get(k, 0) + 1
+        return counts
+    return icount
+
+def join_on(other, key):
+    """
+    join_on :: [b] -> (a -> k) -> [a] -> [(a,b)]
+    Pair every element with each element of another list sharing its key
+    The other list is indexed once, so the returned function can be 
+    reused across many Units in O(n+m) instead of O(n*m)
+    """
+    index = group_by(key)(other)
+    def ijoin(data):
+        res = list()
+        for x in _each(data):
+            for y in index.get(key(x), ()):
+                res.append((x, y))
+        return res
+    return ijoin
+
+# Streaming sinks
+# These make a single pass over a list or iterator and only 
+# hold a bounded amount of state, trading exactness for memory
+
+# A 64-bit hash that is the same in every process
+# hash() collides on small ints (-1 and -2) and is salted per 
+# process for strings, so hash the repr instead
+def _mix(value):
+    digest = hashlib.blake2b(repr(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def reservoir_sample(k):
+    """
+    reservoir_sample :: Int -> [a] -> [a]
+    Pick K elements uniformly at random in one pass (Algorithm R)
+    Every element has an exact K/N chance of being picked, using 
+    only K slots of memory; shorter inputs are returned whole
+    """
+    if isnt_type(Int, k) or k < 0:
+        raise Exception("reservoir_sample() - invalid sample size")
+    def isample(data):
+        res = list()
+        for n, x in enumerate(_each(data)):
+            if n < k:
+                res.append(x)
+            else:
+                j = random.randint(0, n)
+                if j < k:
+                    res[j] = x
+        return res
+    return isample
+
+def approx_distinct(bits=10):
+    """
+    approx_distinct :: Int -> [a] -> Int
+    Estimate the number of distinct elements (HyperLogLog)
+    Uses 2^bits one-byte registers; the standard error is 
+    about 1.04 / sqrt(2^bits), ie. 3.25% for the default of 10
+    Elements are told apart by their repr, so 1 and 1.0 count twice
+    """
+    if isnt_type(Int, bits) or not 4 <= bits <= 16:
+        raise Exception("approx_distinct() - bits must be within 4..16")
+    m = 1 << bits
+    rest = 64 - bits
+    mask = (1 << rest) - 1
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    def idist(data):
+        registers = bytearray(m)
+        for x in _each(data):
+            z = _mix(x)
+            i = z >> rest
+            rank = rest - (z & mask).bit_length() + 1
+            if rank > registers[i]:
+                registers[i] = rank
+        estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        # Small range correction: fall back to linear counting
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    return idist
+
+def approx_quantiles(qs, size=256):
+    """
+    approx_quantiles :: [Float] -> Int -> [a] -> [a]
+    Estimate the values at the given quantiles (0.0 to 1.0)
+    Keeps a stack of compactors holding at most SIZE items each; 
+    a full compactor is sorted and every other item is promoted 
+    with twice the weight. The rank of each answer is off by at 
+    most N * log2(N / SIZE) / SIZE, and usually much less
+    """
+    if isnt_type(Int, size) or size < 2 or odd(size):
+        raise Exception("approx_quantiles() - size must be even")
+    qs = list(qs)
+    if any(isnt_type(Real, q) or not 0 <= q <= 1 for q in qs):
+        raise Exception("approx_quantiles() - quantiles must be within 0..1")
+    def iquant(data):
+        levels = [[]]
+        for x in _each(data):
+            levels[0].append(x)
+            h = 0
+            while len(levels[h]) >= size:
+                buf = sorted(levels[h])
+                levels[h] = []
+                if h + 1 == len(levels):
+                    levels.append([])
+                levels[h + 1].extend(buf[random.randint(0, 1)::2])
+                h += 1
+        weighted = sorted((x, 1 << h) for h, lv in enumerate(levels) for x in lv)
+        if not weighted:
+            return [None for q in qs]
+        total = sum(w for x, w in weighted)
+        res = list()
+        for q in qs:
+            target, seen = q * total, 0
+            for x, w in weighted:
+                seen += w
+                if seen >= target:
+                    break
+            res.append(x)
+        return res
+    return iquant
+
+def top_k(k):
+    """
+    top_k :: Int -> [a] -> [(a, Int)]
+    Find the K most frequent elements and their counts (Space-Saving)
+    Only K counters are kept, evicting the smallest through a heap. 
+    Counts may be over by at most N / K, and any element seen 
+    more than N / K times is guaranteed to be reported
+    """
+    if isnt_type(Int, k) or k < 1:
+        raise Exception("top_k() - invalid amount")
+    def itop(data):
+        counts = dict()
+        heap = list()
+        for n, x in enumerate(_each(data)):
+            if x in counts:
+                counts[x] += 1
+            elif len(counts) < k:
+                counts[x] = 1
+                heapq.heappush(heap, (1, n, x))
+            else:
+                # Heap keys lag behind counts, so refresh stale minimums
+                c, seq, y = heapq.heappop(heap)
+                while c != counts[y]:
+                    c, seq, y = heapq.heappushpop(heap, (counts[y], seq, y))
+                del counts[y]
+                counts[x] = c + 1
+                heapq.heappush(heap, (c + 1, n, x))
+        return sorted(counts.items(), key=lambda p: p[1], reverse=True)
+    return itop
+
+# Sorting
+# Sort in memory when we can, otherwise sort runs that fit 
+# and spill them to disk, then merge the runs back lazily
+# At most this many runs are merged at once, so the number 
+# of open temporary files stays small
+_fanin = 64
+
+def _spill(run):
+    f = tempfile.TemporaryFile()
+    for x in run:
+        pickle.dump(x, f, pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+def _unspill(f):
+    try:
+        while True:
+            yield pickle.load(f)
+    except EOFError:
+        pass
+    finally:
+        f.close()
+
+def _merge(runs, key):
+    return heapq.merge(*[_unspill(f) for f in runs], key=key)
+
+def sort_by(key, memory_limit=100000):
+    """
+    sort_by :: Ord b => (a -> b) -> Int -> [a] -> [a]
+    Sort elements by a key function
+    Lists and streams of up to MEMORY_LIMIT elements are sorted in 
+    memory. Longer streams are cut into sorted runs of MEMORY_LIMIT 
+    elements that are written to temporary files, and a stream 
+    merging the runs is returned instead, so only one run is ever 
+    held in memory. Every 64 runs are merged into one bigger run 
+    on disk, which keeps the number of open files low
+    """
+    if isnt_type(Int, memory_limit) or memory_limit < 1:
+        raise Exception("sort_by() - invalid memory limit")
+    def isort(data):
+        if not _is_stream(data):
+            return sorted(_each(data), key=key)
+        run = list(itertools.islice(data, memory_limit + 1))
+        if len(run) <= memory_limit:
+            return sorted(run, key=key)
+        # levels[h] holds runs made of _fanin ** h sorted chunks
+        levels = [[]]
+        while run:
+            run.sort(key=key)
+            levels[0].append(_spill(run))
+            h = 0
+            while len(levels[h]) >= _fanin:
+                merged = _spill(_merge(levels[h], key))
+                levels[h] = []
+                if h + 1 == len(levels):
+                    levels.append([])
+                levels[h + 1].append(merged)
+                h += 1
+            run = list(itertools.islice(data, memory_limit))
+        # Older runs first keeps the sort stable
+        return _merge([f for lv in reversed(levels) for f in lv], key)
+    return isort
+
+# Saving columns to disk
+# Numbers and strings are written unboxed, see Columnar.py
+def save(path):
+    """
+    save :: String -> [a] -> [a]
+    Write a column (or a tuple of columns) to a binary file
+    The data is passed along unchanged; open it again with Unit.load()
+    Streams are read into lists first, and those are passed along
+    Numbers come back as 64-bit ints or floats and strings as strings; 
+    bools, ints past 64 bits and mixed columns raise an Exception, 
+    and an empty column comes back as an empty StringColumn
+    """
+    def isave(*columns):
+        columns = tuple(list(c) if _is_stream(c) else c for c in columns)
+        if not all(hasattr(c, "__len__") for c in columns):
+            raise Exception("save() - columns must be lists or streams")
+        save_columns(path, columns)
+        return id(*columns)
+    return isave
+
+# Fan out one pass of data to several aggregators
+# Each aggregator runs in its own thread and pulls from a small 
+# queue, so they all move through the data together
+_done = object()
+
+def fanout(*funcs):
+    """
+    fanout :: [[a] -> b] -> [a] -> (b, ...)
+    Feed every element to all the aggregators in a single pass
+    and return a tuple of their results
+    ie: Unit(10) | span | fanout(length, reduce(add), max) = (10, 45, 9)
+    Every aggregator is handed a stream, which every list function 
+    in the Prelude and builtins like sum() or max() accept, and 
+    streams that come back as results are read into lists.
+    Data already in memory (lists, views) is not rebuilt, but each 
+    aggregator walks it once with its own iterator. One-shot streams 
+    are read exactly once and fed to every aggregator in chunks, so 
+    only a few chunks are held at once.
+    """
+    def ifan(data):
+        if not _is_stream(data):
+            results = list()
+            for f in funcs:
+                res = f(iter(_each(data)))
+                results.append(list(res) if _is_stream(res) else res)
+            return tuple(results)
+        queues = [queue.Queue(4) for f in funcs]
+        results = [None for f in funcs]
+        errors = list()
+        def run(i):
+            q = queues[i]
+            ended = [False]
+            def feed():
+                while True:
+                    chunk = q.get()
+                    if chunk is _done:
+                        ended[0] = True
+                        return
+                    for x in chunk:
+                        yield x
+            try:
+                res = funcs[i](feed())
+                results[i] = list(res) if _is_stream(res) else res
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                # Keep draining if we stopped early so the producer can't block
+                while not ended[0]:
+                    ended[0] = q.get() is _done
+        workers = [threading.Thread(target=run, args=(i,)) for i in range(len(funcs))]
+        for w in workers:
+            w.start()
+        try:
+            chunk = tuple(itertools.islice(data, 1024))
+            while chunk:
+                for q in queues:
+                    q.put(chunk)
+                chunk = tuple(itertools.islice(data, 1024))
+        finally:
+            for q in queues:
+                q.put(_done)
+            for w in workers:
+                w.join()
+        if errors:
+            raise errors[0]
+        return tuple(results)
+    return ifan
+
 # concat function
 # Essentially the same as a reduce operation
 # Lists and strings both have + ops
@@ -521,7 +999,7 @@ def join(value=""):
     def isplit(data):
         if isnt_type(String, value):
             raise Exception("join() - non-string argument")
-        if isnt_type(Enum, data):
+        if isnt_type(Enum, data) and not _is_stream(data):
             raise Exception("join() - non-list supplied")
         return value.join(data)
     return isplit
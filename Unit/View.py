@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+"""
+View.py
+
+Zero-copy slices of lists
+
+Slicing a list copies every element it keeps, so walking
+a list with repeated tail calls costs O(n^2). A ListView
+keeps a reference to the original list plus a start and
+stop index instead, and slicing a view makes another view
+of the same list.
+
+Views read like lists (indexing, iterating, len, ==, +)
+and copy the elements they cover only when they are
+mutated, so the original list is never changed through
+them. Changes made to the original list itself will show
+through any views of it.
+"""
+
+import operator
+from collections.abc import Sequence
+
+# Lists and list-like views compare equal when their items do
+# Strings, bytes and tuples never equal a list, so neither do views
+def _listlike(other):
+    return isinstance(other, Sequence) and not isinstance(other, (str, bytes, bytearray, tuple, range))
+
+class ListView(object):
+    """
+    A read-mostly window onto base[start:stop]
+    """
+
+    __slots__ = ['base', 'start', 'stop', 'owned']
+
+    def __init__(self, base, start, stop):
+        self.base = base
+        self.start = start
+        self.stop = stop
+        self.owned = False
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            # The new view shares our base, so stop mutating it in place
+            self.owned = False
+            return ListView(self.base, self.start + start, self.start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ListView index out of range")
+        return self.base[self.start + index]
+
+    # Index straight into the base; islice() would walk past 
+    # every element before start on each pass
+    def __iter__(self):
+        return map(self.base.__getitem__, range(self.start, self.stop))
+
+    def __reversed__(self):
+        return map(self.base.__getitem__, range(self.stop - 1, self.start - 1, -1))
+
+    def index(self, value, start=0, stop=None):
+        start, stop, step = slice(start, stop).indices(len(self))
+        if start < stop:
+            return self.base.index(value, self.start + start, self.start + stop) - self.start
+        raise ValueError("{} is not in ListView".format(repr(value)))
+
+    def count(self, value):
+        return operator.countOf(iter(self), value)
+
+    # Compare like the list we stand in for
+    def compare(self, other, op):
+        if _listlike(other):
+            if op is operator.eq and len(self) != len(other):
+                return False
+            return op(list(self), list(other))
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self.compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self.compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self.compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self.compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self.compare(other, operator.ge)
+
+    __hash__ = None
+
+    # Only lists (and views) add onto lists, like list itself
+    def __add__(self, other):
+        if isinstance(other, (list, ListView)):
+            return list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (list, ListView)):
+            return list(other) + list(self)
+        return NotImplemented
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __mul__(self, times):
+        return list(self) * times
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return repr(list(self))
+
+    # Copy our elements out before the first mutation so the
+    # list we were sliced from is left alone
+    def own(self):
+        if not self.owned:
+            self.base = self.base[self.start:self.stop]
+            self.start = 0
+            self.owned = True
+        return self.base
+
+    def mutate(self, method, *args):
+        result = getattr(self.own(), method)(*args)
+        self.stop = len(self.base)
+        return result
+
+    def __setitem__(self, index, value):
+        self.mutate("__setitem__", index, value)
+
+    def __delitem__(self, index):
+        self.mutate("__delitem__", index)
+
+    def append(self, value):
+        self.mutate("append", value)
+
+    def extend(self, values):
+        self.mutate("extend", values)
+
+    def insert(self, index, value):
+        self.mutate("insert", index, value)
+
+    def remove(self, value):
+        self.mutate("remove", value)
+
+    def pop(self, *index):
+        return self.mutate("pop", *index)
+
+    def reverse(self):
+        self.mutate("reverse")
+
+    def sort(self, *args, **kwargs):
+        self.own().sort(*args, **kwargs)
+
+    def copy(self):
+        return list(self)
+
+Sequence.register(ListView)
+
+# Slice a sequence, viewing lists instead of copying them
+def slice_of(data, start, stop):
+    if isinstance(data, list):
+        start, stop, step = slice(start, stop).indices(len(data))
+        return ListView(data, start, max(start, stop))
+    return data[start:stop]
+
+# end